@@ -12,5 +12,6 @@ async def main():
     await downloader.start()
 
 
-# Run the main function using asyncio
-asyncio.run(main())
+if __name__ == "__main__":
+    # Run the main function using asyncio
+    asyncio.run(main())
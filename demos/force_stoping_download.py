@@ -17,4 +17,5 @@ async def main():
     await downloader.stop()
 
 
-asyncio.run(main())
+if __name__ == "__main__":
+    asyncio.run(main())
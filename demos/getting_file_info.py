@@ -15,4 +15,5 @@ async def main():
     print(f"Total Size: {file_info['total_size']} bytes")
 
 
-asyncio.run(main())
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -17,6 +17,14 @@ setup(
         "Operating System :: OS Independent",
     ],
     python_requires=">=3.8",
-    install_requires=["aiohttp", "aiofiles", "tqdm", "curl_cffi"],
+    install_requires=[
+        "aiohttp",
+        "tqdm",
+        "curl_cffi",
+        "yarl",
+    ],
+    extras_require={
+        "uvloop": ["uvloop; platform_system != 'Windows'"],
+    },
     license="MIT",
 )
@@ -6,29 +6,51 @@
 # Author-email: techshreyash123@gmail.com
 # License: MIT
 
+import os
+import sys
 import aiohttp
-import aiofiles
 import asyncio
 import inspect
+import collections
+import threading
+import time
 from tqdm import tqdm
 from pathlib import Path
 from techzdl.extra import (
+    batch_chunks,
     change_file_path_if_exist,
     get_random_string,
-    AdjustableSemaphore,
     get_filename,
+    install_uvloop,
+    preallocate_file,
+    write_at,
 )
 from techzdl.logger import Logger
-from typing import Callable, Any, Union, Awaitable, Optional, List
+from typing import Callable, Any, Union, Awaitable, Optional, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from curl_cffi.requests import AsyncSession
 
+# Network reads are collected into pieces of at least this size before each write
+WRITE_BATCH_SIZE = 1024 * 1024
+
+# start() reuses the file info from get_file_info() for this many seconds
+FILE_INFO_CACHE_SECONDS = 60
+
+# A worker claims adjacent queued ranges until it expects a request to take about
+# this many seconds at the speed it measured last, but never more than MAX_REQUEST_SIZE
+REQUEST_TARGET_SECONDS = 10
+MAX_REQUEST_SIZE = 64 * 1024 * 1024
+
 
 class TechZDL:
+    # Also available as `TechZDL.install_uvloop()`, call it before `asyncio.run`
+    install_uvloop = staticmethod(install_uvloop)
+
     def __init__(
         self,
         url: str,
         custom_headers: Optional[dict] = None,
-        output_dir: Union[str, Path] = Path("downloads"),
+        output_dir: Optional[Union[str, Path]] = None,
         filename: Optional[str] = None,
         workers: Optional[int] = None,
         initial_dynamic_workers: int = 2,
@@ -43,6 +65,8 @@ class TechZDL:
         chunk_size: int = 5 * 1024 * 1024,
         single_threaded: bool = False,
         max_retries: int = 3,
+        session: Optional[aiohttp.ClientSession] = None,
+        max_dynamic_workers: int = 64,
     ) -> None:
         """
         Initialize the TechZDL object.
@@ -50,7 +74,7 @@ class TechZDL:
         #### Args:
             - `url` `(str)`: URL of the file to download.
             - `custom_headers` `(Optional[dict], optional)`: Custom headers to send with the request. Defaults to None.
-            - `output_dir` `(Union[str, Path], optional)`: Directory where the file will be saved. Defaults to "downloads".
+            - `output_dir` `(Optional[Union[str, Path]], optional)`: Directory where the file will be saved. Defaults to "downloads".
             - `filename` `(Optional[str], optional)`: Name to save the file as (including extension). By default, this will be determined automatically.
             - `workers` `(Optional[int], optional)`: Number of fixed concurrent download workers. By default, this will be dynamically adjusted based on the download speed. Setting this will disable dynamic worker adjustment.
             - `initial_dynamic_workers` `(int, optional)`: Initial number of dynamic workers. Defaults to 2.
@@ -60,9 +84,11 @@ class TechZDL:
             - `progress_callback` `(Optional[Union[Callable[..., Any], Callable[..., Awaitable[Any]]]], optional)`: Callback function for download progress updates. Can be sync or async. Defaults to None. Setting this disables tqdm progress.
             - `progress_args` `(tuple, optional)`: Additional arguments for progress_callback. Defaults to ().
             - `progress_interval` `(int, optional)`: Time interval for progress updates in seconds. Defaults to 1.
-            - `chunk_size` `(int, optional)`: Size of each download chunk in bytes. Defaults to 5 MB.
+            - `chunk_size` `(int, optional)`: Size of each download chunk in bytes. Large files and fast connections may fetch several adjacent chunks in one request. Defaults to 5 MB.
             - `single_threaded` `(bool, optional)`: Force single-threaded download. Defaults to False.
             - `max_retries` `(int, optional)`: Maximum retries for each chunk/file download. Defaults to 3.
+            - `session` `(Optional[aiohttp.ClientSession], optional)`: Existing aiohttp session to send requests with, so several downloads can share its connection pool. It is never closed by the downloader. By default, a new session is created for each download.
+            - `max_dynamic_workers` `(int, optional)`: Upper limit for the number of dynamic workers. The connection pool is sized to allow this many concurrent requests. Defaults to 64.
 
         #### Examples:
         ```python
@@ -82,15 +108,13 @@ class TechZDL:
         self.id = get_random_string(6)
         self.url = url
         self.custom_headers = custom_headers
-        self.output_dir = (
-            Path(output_dir) if isinstance(output_dir, str) else output_dir
-        )
+        self.output_dir = Path("downloads" if output_dir is None else output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.output_path = None
         self.filename = filename
         self.workers = workers
         self.debug = debug
-        self.logger = Logger(f"TechZDL - {self.id}")
+        self.logger = Logger(self.id)
         self.progress = progress
         self.progress_callback = progress_callback
         self.progress_args = progress_args
@@ -100,12 +124,23 @@ class TechZDL:
         self.is_callback_async = inspect.iscoroutinefunction(progress_callback)
         self.dynamic_workers = initial_dynamic_workers
         self.dynamic_workers_update_interval = dynamic_workers_update_interval
+        self.max_dynamic_workers = max_dynamic_workers
         self.curl_cffi_required = False
         self.max_retries = max_retries
         self.session = None
+        self._external_session = session
         self.is_running = False
         self.downloader_tasks = []
         self.temp_file_path = None
+        self._temp_fd = None
+        self._io_pool = None
+        self._chunk_workers = set()
+        self._active_chunk_workers = 0
+        self._chunk_requests = 0
+        self._chunk_failures = 0
+        self._progress_event = None
+        self._download_completed = None
+        self._file_info_cache = None
         self.download_success = False
         self.download_error = None
         self.background_download = False
@@ -179,67 +214,189 @@ class TechZDL:
         - `filename` `(str)`: Name as returned by the server or determined by the TechZDL package using response headers and download URL.
         - `total_size` `(int)`: Total size of the file in bytes.
         """
-        for i in range(self.max_retries):
-            try:
-
-                session = aiohttp.ClientSession()
-
-                self._log(f"Fetching file info from {self.url}")
-                response = None
-                try:
-                    response = await session.get(
-                        url=self.url, headers=self.custom_headers
-                    )
-                except Exception as e:
-                    raise e
-                finally:
-                    if response:
-                        response.close()
-                total_size = int(response.headers.get("Content-Length", 0))
-                if total_size == 0:
-                    raise Exception("Content-Length header is missing or invalid")
+        session, info = await self._fetch_file_info()
+        await self._close_session(session)
+
+        # Let start() skip the probe if it follows shortly after
+        self._file_info_cache = (
+            time.monotonic(),
+            isinstance(session, AsyncSession),
+            info,
+        )
+        return {"filename": str(info["filename"]), "total_size": info["total_size"]}
 
-                filename = get_filename(response.headers, response.url, self.id)
-                break
-            except Exception as e:
-                try:
-                    self._log(
-                        f"Failed to get file info using aiohttp: {e}", level="error"
-                    )
-                    await session.close()
+    async def _fetch_file_info(
+        self,
+    ) -> Tuple[Union[aiohttp.ClientSession, AsyncSession], dict]:
+        """
+        Fetch the file info with aiohttp, falling back to curl_cffi if that fails, retrying up to `max_retries` times.
 
-                    session = AsyncSession()
+        One session of each kind is created and reused across retries. Once aiohttp gets a
+        403/429 response or a TLS error, which usually means its client is being blocked,
+        only curl_cffi is tried on the remaining retries.
 
-                    response = None
+        Returns:
+            Tuple[Union[aiohttp.ClientSession, AsyncSession], dict]: The session that succeeded, left open,
+            and the info returned by `_request_file_info`.
+        """
+        self._log(f"Fetching file info from {self.url}")
+        aiohttp_session = self._create_session()
+        curl_session = None
+        session = None
+        aiohttp_blocked = False
+        try:
+            for i in range(self.max_retries):
+                if not aiohttp_blocked:
                     try:
-                        response = await session.get(
-                            url=self.url, headers=self.custom_headers, stream=True
-                        )
+                        info = await self._request_file_info(aiohttp_session)
+                        session = aiohttp_session
+                        return session, info
                     except Exception as e:
-                        raise e
-                    finally:
-                        if response:
-                            response.close()
-
-                    total_size = int(response.headers.get("Content-Length", 0))
-                    if total_size == 0:
-                        raise Exception("Content-Length header is missing or invalid")
+                        self._log(
+                            f"Failed to get file info using aiohttp: {e}", level="error"
+                        )
+                        aiohttp_blocked = isinstance(e, aiohttp.ClientSSLError) or (
+                            isinstance(e, aiohttp.ClientResponseError)
+                            and e.status in (403, 429)
+                        )
 
-                    filename = get_filename(response.headers, response.url, self.id)
-                    break
+                try:
+                    if curl_session is None:
+                        curl_session = AsyncSession()
+                    info = await self._request_file_info(curl_session)
+                    session = curl_session
+                    return session, info
                 except Exception as e:
                     self._log(f"Error getting file info: {e}", level="error")
                     if i == self.max_retries - 1:
-                        await session.close()
                         raise e
                     self._log(
                         f"Retrying getting file info ({i + 1}/{self.max_retries})",
                         level="warning",
                     )
                     await asyncio.sleep(2**i)  # Exponential backoff
+        finally:
+            if aiohttp_session is not session:
+                await self._close_session(aiohttp_session)
+            if curl_session and curl_session is not session:
+                await curl_session.close()
+
+    async def _request_file_info(
+        self, session: Union[aiohttp.ClientSession, AsyncSession]
+    ) -> dict:
+        """
+        Request the file headers with a HEAD request, falling back to a single byte range GET
+        if the server rejects HEAD or does not report the file size in it.
+
+        Args:
+            session (Union[aiohttp.ClientSession, AsyncSession]): Session to send the requests with.
+
+        Returns:
+            dict: `{"filename": PurePath, "total_size": int, "accept_ranges": Optional[str]}`
+        """
+        is_curl_cffi = isinstance(session, AsyncSession)
+
+        async with self._open_request(
+            session, "HEAD", headers=self.custom_headers, allow_redirects=True
+        ) as response:
+            status = response.status_code if is_curl_cffi else response.status
+            response_headers = response.headers
+            response_url = response.url
+
+        total_size = int(response_headers.get("Content-Length", 0))
+        accept_ranges = response_headers.get("Accept-Ranges")
+
+        if status >= 400 or total_size == 0:
+            headers = {**(self.custom_headers or {}), "Range": "bytes=0-0"}
+            async with self._open_request(session, "GET", headers=headers) as response:
+                status = response.status_code if is_curl_cffi else response.status
+                response_headers = response.headers
+                response_url = response.url
+
+            if status >= 400:
+                if not is_curl_cffi:
+                    raise aiohttp.ClientResponseError(
+                        response.request_info,
+                        response.history,
+                        status=status,
+                        message=f"Server responded with HTTP {status}",
+                    )
+                raise Exception(f"Server responded with HTTP {status}")
+
+            if status == 206:
+                content_range = response_headers.get("Content-Range", "")
+                total_size = content_range.rpartition("/")[2]
+                total_size = int(total_size) if total_size.isdigit() else 0
+                accept_ranges = "bytes"
+            else:
+                total_size = int(response_headers.get("Content-Length", 0))
+                accept_ranges = response_headers.get("Accept-Ranges")
+
+        if total_size == 0:
+            raise Exception("Content-Length header is missing or invalid")
+
+        filename = await asyncio.get_running_loop().run_in_executor(
+            None, get_filename, response_headers, response_url, self.id
+        )
+        return {
+            "filename": filename,
+            "total_size": total_size,
+            "accept_ranges": accept_ranges,
+        }
+
+    def _open_request(
+        self, session: Union[aiohttp.ClientSession, AsyncSession], method: str, **kwargs
+    ):
+        """
+        Open a streamed request to the file URL, to be used with `async with`.
+
+        The response is released when the block exits, even if reading the body failed.
+
+        Args:
+            session (Union[aiohttp.ClientSession, AsyncSession]): Session to send the request with.
+            method (str): HTTP method to use.
+            **kwargs: Extra arguments for the request, such as `headers`.
+        """
+        if isinstance(session, AsyncSession):
+            return session.stream(method, self.url, **kwargs)
+        return session.request(method, self.url, **kwargs)
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        """
+        Create an aiohttp session whose connection pool is sized for the download workers,
+        or return the session passed to the constructor.
 
-        await session.close()
-        return {"filename": str(filename), "total_size": total_size}
+        Returns:
+            aiohttp.ClientSession: The new session.
+        """
+        if self._external_session:
+            return self._external_session
+
+        # Enough connections for the most workers this download can run at once
+        limit = max(self.workers or 0, self.max_dynamic_workers)
+        connector = aiohttp.TCPConnector(
+            limit=limit,
+            limit_per_host=limit,
+            ttl_dns_cache=300,
+            keepalive_timeout=75,
+            force_close=False,
+        )
+        # aiohttp's default 5 minute total timeout would abort any long download,
+        # only give up on connections that stall instead
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60)
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def _close_session(
+        self, session: Union[aiohttp.ClientSession, AsyncSession]
+    ) -> None:
+        """
+        Close a session created by the downloader. A session passed to the constructor is left open.
+
+        Args:
+            session (Union[aiohttp.ClientSession, AsyncSession]): The session to close.
+        """
+        if session is not self._external_session:
+            await session.close()
 
     def _log(self, message: str, level: str = "info") -> None:
         """
@@ -261,28 +418,17 @@ class TechZDL:
         """
         Run a list of async tasks concurrently, handling exceptions and cancellations.
 
+        If one task fails, the others are cancelled and its exception is raised.
+
         Args:
             tasks (List[Awaitable]): List of async tasks to run.
         """
 
         try:
-            new_tasks = [asyncio.create_task(task) for task in tasks]
-            tasks = new_tasks
-            for task in tasks:
-                self.downloader_tasks.append(task)
-
-            done, pending = await asyncio.wait(
-                tasks, return_when=asyncio.FIRST_EXCEPTION
-            )
-            for task in tasks:
-                self.downloader_tasks.remove(task)
-
-            for task in done:
-                if task.exception():
-                    for pending_task in pending:
-                        pending_task.cancel()
-                    await asyncio.gather(*pending, return_exceptions=True)
-                    raise task.exception()
+            if sys.version_info >= (3, 11):
+                await self._run_task_group(tasks)
+            else:
+                await self._run_task_wait(tasks)
         except Exception as e:
             self._log(
                 f"Exception raised in task runner: {e}",
@@ -290,6 +436,80 @@ class TechZDL:
             )
             raise e
 
+    async def _run_task_group(self, tasks: List[Awaitable]) -> None:
+        new_tasks = []
+        try:
+            async with asyncio.TaskGroup() as group:
+                for task in tasks:
+                    new_task = group.create_task(task)
+                    new_tasks.append(new_task)
+                    self.downloader_tasks.append(new_task)
+        except BaseExceptionGroup as e:
+            # Raise the original error, callers don't expect exception groups
+            raise e.exceptions[0] from None
+        finally:
+            for task in new_tasks:
+                self.downloader_tasks.remove(task)
+
+    async def _run_task_wait(self, tasks: List[Awaitable]) -> None:
+        tasks = [asyncio.create_task(task) for task in tasks]
+        for task in tasks:
+            self.downloader_tasks.append(task)
+
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in tasks:
+            self.downloader_tasks.remove(task)
+
+        for task in done:
+            if task.exception():
+                for pending_task in pending:
+                    pending_task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                raise task.exception()
+
+    def _add_progress(self, size: int) -> None:
+        """
+        Add downloaded bytes to the progress counter and wake the progress display.
+
+        Args:
+            size (int): Number of bytes to add.
+        """
+        self.size_done += size
+        self._progress_event.set()
+        if self.size_done >= self.total_size:
+            self._download_completed.set()
+
+    async def _wait_for_completion(self, timeout: float) -> bool:
+        """
+        Wait up to `timeout` seconds for all bytes of the file to be downloaded.
+
+        Args:
+            timeout (float): Maximum time to wait in seconds.
+
+        Returns:
+            bool: True if the download has completed.
+        """
+        try:
+            await asyncio.wait_for(self._download_completed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self._download_completed.is_set()
+
+    async def _wait_for_progress(self, last_update: float) -> None:
+        """
+        Wait until `progress_interval` seconds have passed since the last update, then until new bytes have been downloaded.
+        Returns early once the download completes.
+
+        Args:
+            last_update (float): Event loop time at which the last update started.
+        """
+        loop = asyncio.get_running_loop()
+        remaining = max(0, last_update + self.progress_interval - loop.time())
+        if await self._wait_for_completion(remaining):
+            return
+        await self._progress_event.wait()
+        self._progress_event.clear()
+
     async def _show_progress(self, description: str) -> None:
         """
         Show download progress either via a callback or tqdm progress bar.
@@ -297,93 +517,138 @@ class TechZDL:
         Args:
             description (str): Description for the progress display.
         """
+        loop = asyncio.get_running_loop()
         previous_size = 0
 
         if self.progress_callback:
+            callback = self.progress_callback
+            total_size = self.total_size
+            args = self.progress_args
+
+            # Pick the call once instead of checking for a coroutine on every update
+            if self.is_callback_async:
+
+                async def emit(size: int) -> None:
+                    await callback(description, size, total_size, *args)
+
+            else:
+
+                async def emit(size: int) -> None:
+                    callback(description, size, total_size, *args)
+
             while self.size_done < self.total_size:
+                last_update = loop.time()
                 if self.size_done != previous_size:
-                    if self.is_callback_async:
-                        await self.progress_callback(
-                            description,
-                            self.size_done,
-                            self.total_size,
-                            *self.progress_args,
-                        )
-                    else:
-                        self.progress_callback(
-                            description,
-                            self.size_done,
-                            self.total_size,
-                            *self.progress_args,
-                        )
-
+                    await emit(self.size_done)
                     previous_size = self.size_done
 
-                await asyncio.sleep(self.progress_interval)
+                await self._wait_for_progress(last_update)
 
-            if self.is_callback_async:
-                await self.progress_callback(
-                    description, self.total_size, self.total_size, *self.progress_args
-                )
-            else:
-                self.progress_callback(
-                    description, self.total_size, self.total_size, *self.progress_args
-                )
+            await emit(self.total_size)
         else:
             if self.progress:
-                with tqdm(
-                    total=self.total_size,
-                    unit="B",
-                    unit_scale=True,
-                    unit_divisor=1024,
-                    desc=description,
-                    bar_format="{desc}: {percentage:3.0f}% |{bar}| {n_fmt}B/{total_fmt}B [{elapsed}<{remaining}, {rate_fmt}{postfix}]",
-                ) as pbar:
-                    while self.size_done < self.total_size:
-                        if self.size_done != previous_size:
-                            pbar.update(self.size_done - previous_size)
-                            previous_size = self.size_done
-
-                        await asyncio.sleep(self.progress_interval)
-                    pbar.update(self.total_size - previous_size)
-
-    async def _load_chunk(
-        self, start: int, end: int, semaphore: AdjustableSemaphore
-    ) -> None:
+                # tqdm writes to the terminal, keep that off the event loop
+                stop = threading.Event()
+                thread = threading.Thread(
+                    target=self._tqdm_progress,
+                    args=(description, stop),
+                    name=f"TechZDL-{self.id}-progress",
+                    daemon=True,
+                )
+                thread.start()
+                try:
+                    await self._download_completed.wait()
+                finally:
+                    stop.set()
+                    # The bar may be in the middle of a terminal write, wait for it off the loop
+                    await loop.run_in_executor(None, thread.join)
+
+    def _tqdm_progress(self, description: str, stop: threading.Event) -> None:
+        """
+        Show download progress with a tqdm progress bar until `stop` is set. Runs in its own thread.
+
+        Args:
+            description (str): Description for the progress bar.
+            stop (threading.Event): Event that ends the progress bar.
+        """
+        with tqdm(
+            total=self.total_size,
+            unit="B",
+            unit_scale=True,
+            unit_divisor=1024,
+            desc=description,
+            smoothing=0.1,
+            bar_format="{desc}: {percentage:3.0f}% |{bar}| {n_fmt}B/{total_fmt}B [{elapsed}<{remaining}, {rate_fmt}{postfix}]",
+        ) as pbar:
+            previous_size = 0
+            while not stop.wait(self.progress_interval):
+                size_done = self.size_done
+                if size_done != previous_size:
+                    pbar.update(size_done - previous_size)
+                    previous_size = size_done
+            pbar.update(self.size_done - previous_size)
+
+    async def _load_chunk(self, start: int, end: int) -> None:
         """
-        Load a chunk of the file.
+        Load a chunk of the file, streaming it into the temporary file as it arrives.
 
         Args:
-            temp_file_path (Path): Path to the temporary file.
             start (int): Start byte of the chunk.
             end (int): End byte of the chunk.
-            semaphore (AdjustableSemaphore): Semaphore to control concurrency.
         """
-        await semaphore.acquire()
         try:
+            offset = start  # Resume from here if retrying
+            write_error = None
+
             for i in range(self.max_retries):
+                self._chunk_requests += 1
                 try:
-                    headers = {"Range": f"bytes={start}-{end}"}
+                    headers = {"Range": f"bytes={offset}-{end}"}
                     if self.custom_headers:
                         headers.update(self.custom_headers)
 
-                    response = None
-                    try:
-                        response = await self.session.get(url=self.url, headers=headers)
-                        chunk = await response.content.read()
-                    except Exception as e:
-                        raise e
-                    finally:
-                        if response:
-                            response.close()
+                    async with self._open_request(
+                        self.session, "GET", headers=headers
+                    ) as response:
+                        if self.curl_cffi_required:
+                            pieces = response.aiter_content()
+                        else:
+                            pieces = response.content.iter_any()
+                        pieces = batch_chunks(pieces, WRITE_BATCH_SIZE)
+
+                        status = (
+                            response.status_code
+                            if self.curl_cffi_required
+                            else response.status
+                        )
+                        if status != 206:
+                            raise Exception(
+                                f"Expected HTTP 206 for range request, got {status}"
+                            )
 
-                    async with aiofiles.open(self.temp_file_path, "r+b") as file:
-                        await file.seek(start)
-                        await file.write(chunk)
+                        async for piece in pieces:
+                            if offset + len(piece) > end + 1:
+                                raise Exception("Server sent more data than requested")
+                            try:
+                                await self._write_at(self._temp_fd, piece, offset)
+                            except OSError as e:
+                                write_error = e
+                                raise e
+                            offset += len(piece)
+                            self._add_progress(len(piece))
+
+                        if offset != end + 1:
+                            raise Exception(
+                                f"Chunk size mismatch: {offset - start} of {end - start + 1} bytes"
+                            )
 
-                    self.size_done += len(chunk)
                     break
                 except Exception as e:
+                    if e is write_error:
+                        # A local disk error (e.g. disk full) won't go away by downloading again
+                        raise e
+
+                    self._chunk_failures += 1
                     self._log(
                         f"Error downloading chunk {start}-{end}: {e}", level="error"
                     )
@@ -394,86 +659,192 @@ class TechZDL:
                         level="warning",
                     )
                     await asyncio.sleep(2**i)  # Exponential backoff
-        except asyncio.CancelledError:
-            pass
         except Exception as e:
             self._log(f"Failed to download chunk {start}-{end}: {e}", level="error")
             raise e
+
+    async def _chunk_worker(self, queue: asyncio.Queue) -> None:
+        """
+        Download queued chunks one after another until the queue is empty,
+        or until there are more workers running than `dynamic_workers`.
+
+        A worker that got through its last range quickly takes the following queued ranges
+        along in the same request, as long as enough are left for every worker that may
+        still be started.
+
+        Args:
+            queue (asyncio.Queue): Queue of `(start, end)` byte ranges to download.
+        """
+        loop = asyncio.get_running_loop()
+        target_size = 0
+        try:
+            while (
+                not queue.empty()
+                and self._active_chunk_workers <= self.dynamic_workers
+            ):
+                start, end = queue.get_nowait()
+                # Ranges are queued in order, so the next one starts right after `end`.
+                # Take at most a fair share of them, leaving a range for every worker
+                # the updater may still start
+                extra_ranges = (queue.qsize() - 1) // (
+                    self.workers or self.max_dynamic_workers
+                )
+                while end - start + 1 < target_size and extra_ranges > 0:
+                    _, end = queue.get_nowait()
+                    extra_ranges -= 1
+
+                started = loop.time()
+                await self._load_chunk(start, end)
+                elapsed = max(loop.time() - started, 0.001)
+                target_size = min(
+                    MAX_REQUEST_SIZE,
+                    (end - start + 1) * REQUEST_TARGET_SECONDS / elapsed,
+                )
         finally:
-            await semaphore.release()
+            self._active_chunk_workers -= 1
 
-    async def _temp_file_creator(self, total_chunks: int) -> None:
+    def _spawn_chunk_workers(self, queue: asyncio.Queue) -> None:
         """
-        Create a temporary file with the specified size.
+        Start chunk workers until `dynamic_workers` are running or every queued chunk has a worker.
 
         Args:
-            temp_file_path (Path): Path to the temporary file.
-            total_chunks (int): Total number of chunks.
+            queue (asyncio.Queue): Queue of `(start, end)` byte ranges to download.
         """
-        async with aiofiles.open(self.temp_file_path, "wb") as file:
-            for i in range(total_chunks):
-                start = i * self.chunk_size
-                end = min(start + self.chunk_size - 1, self.total_size - 1)
-                await file.write(b"\0" * (end - start + 1))
-                self.size_done += end - start + 1
+        while self._active_chunk_workers < min(self.dynamic_workers, queue.qsize()):
+            self._active_chunk_workers += 1
+            self._chunk_workers.add(asyncio.create_task(self._chunk_worker(queue)))
 
-    async def _dynamic_worker_updater(self, semaphore: AdjustableSemaphore) -> None:
+    async def _chunk_worker_pool(self, queue: asyncio.Queue) -> None:
         """
-        Dynamically update the number of workers based on download speed.
+        Run chunk workers until the queue is drained, raising the first error any of them hits.
 
         Args:
-            semaphore (AdjustableSemaphore): Semaphore to control concurrency.
+            queue (asyncio.Queue): Queue of `(start, end)` byte ranges to download.
         """
-        prev_downloaded = 0
-        prev_speed = 0
+        self._spawn_chunk_workers(queue)
+        try:
+            while self._chunk_workers:
+                done, _ = await asyncio.wait(
+                    self._chunk_workers, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    self._chunk_workers.discard(task)
+                    task.result()
+        finally:
+            for task in self._chunk_workers:
+                task.cancel()
+            await asyncio.gather(*self._chunk_workers, return_exceptions=True)
+            self._chunk_workers.clear()
+            self._active_chunk_workers = 0
 
-        while True:
-            if self.size_done >= self.total_size:
-                break
-            await asyncio.sleep(self.dynamic_workers_update_interval)
+    async def _temp_file_creator(self) -> None:
+        """
+        Create the temporary file and reserve `total_size` bytes for it, without writing any data.
+        """
+        self._temp_fd = os.open(
+            self.temp_file_path,
+            os.O_CREAT | os.O_RDWR | os.O_TRUNC | getattr(os, "O_BINARY", 0),
+            0o644,
+        )
+        await asyncio.get_running_loop().run_in_executor(
+            self._io_pool, preallocate_file, self._temp_fd, self.total_size
+        )
 
-            speed = (
-                self.size_done - prev_downloaded
-            ) / self.dynamic_workers_update_interval
+    async def _dynamic_worker_updater(self, queue: asyncio.Queue) -> None:
+        """
+        Dynamically update the number of workers based on download speed.
 
-            if speed > prev_speed:
-                self.dynamic_workers += 2
-                await semaphore.set_limit(self.dynamic_workers)
-            elif speed < prev_speed:
-                self.dynamic_workers = max(2, self.dynamic_workers - 2)
-                await semaphore.set_limit(self.dynamic_workers)
+        The speed is compared with the best speed seen over the last few intervals, so a
+        single slow interval (a retransmit, server jitter) does not shrink the pool. If more
+        than 10% of the chunk requests in an interval fail, the pool is halved.
 
+        Args:
+            queue (asyncio.Queue): Queue of `(start, end)` byte ranges to download.
+        """
+        loop = asyncio.get_running_loop()
+        prev_downloaded = 0
+        recent_speeds = collections.deque(maxlen=10)
+        best_workers = self.dynamic_workers
+        slow_intervals = 0
+        prev_requests = 0
+        prev_failures = 0
+
+        # Keep adjusting while the last ranges are in flight, shrinking the pool still matters then
+        while self._chunk_workers or not queue.empty():
+            started = loop.time()
+            if await self._wait_for_completion(self.dynamic_workers_update_interval):
+                return
+            elapsed = loop.time() - started
+
+            # How late the sleep woke up tells how busy the event loop is
+            loop_lag = elapsed - self.dynamic_workers_update_interval
+            speed = (self.size_done - prev_downloaded) / elapsed
             prev_downloaded = self.size_done
-            prev_speed = speed
+
+            best_speed = max(recent_speeds, default=0)
+            recent_speeds.append(speed)
+
+            requests = self._chunk_requests - prev_requests
+            failures = self._chunk_failures - prev_failures
+            prev_requests = self._chunk_requests
+            prev_failures = self._chunk_failures
+
+            if requests and failures / requests > 0.1:
+                # The server is rejecting or dropping requests, halve the load right away
+                slow_intervals = 0
+                self.dynamic_workers = max(2, self.dynamic_workers // 2)
+            elif speed > 1.05 * best_speed:
+                # The last change paid off, keep adding workers. More workers won't
+                # help if the loop itself is the bottleneck, and an idle loop can ramp up faster
+                slow_intervals = 0
+                best_workers = self.dynamic_workers
+                if loop_lag < 0.01:
+                    step = max(2, self.dynamic_workers // 4)
+                elif loop_lag <= 0.05:
+                    step = 2
+                else:
+                    step = 0
+
+                new_workers = min(self.max_dynamic_workers, self.dynamic_workers + step)
+                if new_workers > self.dynamic_workers:
+                    self.dynamic_workers = new_workers
+                    self._spawn_chunk_workers(queue)
+            elif speed >= 0.95 * best_speed:
+                slow_intervals = 0
+            else:
+                slow_intervals += 1
+                if slow_intervals >= 3:
+                    # Back off towards the worker count that gave the best speed, surplus
+                    # workers exit after finishing their current chunk
+                    slow_intervals = 0
+                    new_workers = int(self.dynamic_workers / 1.25)
+                    if self.dynamic_workers > best_workers:
+                        new_workers = max(best_workers, new_workers)
+                    self.dynamic_workers = max(2, new_workers)
 
     async def _single_threaded_download_child(self) -> None:
-        response = None
-        if self.curl_cffi_required:
-            try:
-                response = await self.session.get(
-                    url=self.url, headers=self.custom_headers, stream=True
-                )
-                async with aiofiles.open(self.output_path, "wb") as output_file:
-                    async for chunk in response.aiter_content():
-                        await output_file.write(chunk)
-                        self.size_done += len(chunk)
-            except Exception as e:
-                raise e
-            finally:
-                if response:
-                    response.close()
-        else:
-            try:
-                response = await self.session.get(self.url, headers=self.custom_headers)
-                async with aiofiles.open(self.output_path, "wb") as output_file:
-                    while chunk := await response.content.read(self.chunk_size):
-                        await output_file.write(chunk)
-                        self.size_done += len(chunk)
-            except Exception as e:
-                raise e
-            finally:
-                if response:
-                    response.close()
+        fd = os.open(
+            self.output_path,
+            os.O_CREAT | os.O_WRONLY | os.O_TRUNC | getattr(os, "O_BINARY", 0),
+            0o644,
+        )
+        try:
+            async with self._open_request(
+                self.session, "GET", headers=self.custom_headers
+            ) as response:
+                if self.curl_cffi_required:
+                    pieces = response.aiter_content()
+                else:
+                    pieces = response.content.iter_any()
+                pieces = batch_chunks(pieces, WRITE_BATCH_SIZE)
+
+                offset = 0
+                async for piece in pieces:
+                    await self._write_at(fd, piece, offset)
+                    offset += len(piece)
+                    self._add_progress(len(piece))
+        finally:
+            os.close(fd)
 
     async def _single_threaded_download(self) -> None:
         """
@@ -509,38 +880,68 @@ class TechZDL:
             f"Creating temp file {self.temp_file_path.name} of size {self.total_size} bytes"
         )
 
-        await self._task_runner(
-            [
-                self._temp_file_creator(total_chunks),
-                self._show_progress("Creating Temp File"),
-            ]
-        )
-        self.size_done = 0
+        await self._temp_file_creator()
+
+        queue = asyncio.Queue()
 
-        semaphore = AdjustableSemaphore(self.dynamic_workers)
-        tasks = []
+        # Large files fetch up to 8 adjacent chunks per request, as long as that still
+        # leaves at least 32 requests to spread over the workers
+        chunks_per_request = max(1, min(8, total_chunks // 32))
+        request_size = self.chunk_size * chunks_per_request
 
-        for i in range(total_chunks):
-            start = i * self.chunk_size
-            end = min(start + self.chunk_size - 1, self.total_size - 1)
-            task = self._load_chunk(start, end, semaphore)
-            tasks.append(task)
+        for start in range(0, self.total_size, request_size):
+            end = min(start + request_size - 1, self.total_size - 1)
+            queue.put_nowait((start, end))
 
         self._log(f"Starting download of {self.filename}")
 
         if self.workers:
             self.dynamic_workers = self.workers
-            await semaphore.set_limit(self.dynamic_workers)
-        else:
-            tasks.append(self._dynamic_worker_updater(semaphore))
 
-        tasks.append(self._show_progress("Downloading"))
+        tasks = [self._chunk_worker_pool(queue), self._show_progress("Downloading")]
+        if not self.workers:
+            tasks.append(self._dynamic_worker_updater(queue))
 
         await self._task_runner(tasks)
+        self._close_temp_fd()
         self.temp_file_path.rename(self.output_path)
         self.temp_file_path = None
 
+    async def _write_at(self, fd: int, data: bytes, offset: int) -> None:
+        """
+        Write data at the given file offset using the download's I/O thread pool.
+
+        If the calling task is cancelled, the write is still allowed to finish so the
+        file descriptor can be closed safely afterwards.
+
+        Args:
+            fd (int): File descriptor to write to.
+            data (bytes): Data to write.
+            offset (int): Byte offset in the file.
+        """
+        future = asyncio.get_running_loop().run_in_executor(
+            self._io_pool, write_at, fd, data, offset
+        )
+        try:
+            await asyncio.shield(future)
+        except asyncio.CancelledError:
+            await asyncio.wait([future])
+            raise
+
+    def _shutdown_io_pool(self) -> None:
+        if self._io_pool:
+            self._io_pool.shutdown(wait=False)
+            self._io_pool = None
+
+    def _close_temp_fd(self) -> None:
+        if self._temp_fd is not None:
+            os.close(self._temp_fd)
+            self._temp_fd = None
+
     async def _cleanup(self) -> None:
+        self._close_temp_fd()
+        self._shutdown_io_pool()
+
         if self.is_running and self.output_path:
             self.output_path.unlink(missing_ok=True)
 
@@ -548,89 +949,39 @@ class TechZDL:
             self.temp_file_path.unlink(missing_ok=True)
 
         if self.session:
-            await self.session.close()
+            await self._close_session(self.session)
 
     async def _download_manager(self) -> Path:
         try:
             self.size_done = 0
+            self._progress_event = asyncio.Event()
+            self._download_completed = asyncio.Event()
+            # Writes are short pwrite calls into the page cache, a few threads keep up
+            self._io_pool = ThreadPoolExecutor(
+                max_workers=min(4, os.cpu_count() or 1),
+                thread_name_prefix=f"TechZDL-{self.id}",
+            )
             self._log("Initializing download process")
 
-            for i in range(self.max_retries):
-
-                try:
-                    if self.session:
-                        await self.session.close()
-                    self.session = aiohttp.ClientSession()
-
-                    self._log(f"Fetching file info from {self.url}")
-                    response = None
-                    try:
-                        response = await self.session.get(
-                            url=self.url, headers=self.custom_headers
-                        )
-                    except Exception as e:
-                        raise e
-                    finally:
-                        if response:
-                            response.close()
-
-                    self.total_size = int(response.headers.get("Content-Length", 0))
-                    if self.total_size == 0:
-                        raise Exception("Content-Length header is missing or invalid")
-
-                    if not self.filename:
-                        self.filename = get_filename(
-                            response.headers, response.url, self.id
-                        )
-                    accept_ranges = response.headers.get("Accept-Ranges")
-                    break
-                except Exception as e:
-                    try:
-                        self._log(
-                            f"Failed to get file info using aiohttp: {e}", level="error"
-                        )
-                        await self.session.close()
-
-                        self.session = AsyncSession()
-                        self.curl_cffi_required = True
-
-                        response = None
-                        try:
-                            response = await self.session.get(
-                                url=self.url, headers=self.custom_headers, stream=True
-                            )
-                        except Exception as e:
-                            raise e
-                        finally:
-                            if response:
-                                response.close()
-
-                        self.total_size = int(response.headers.get("Content-Length", 0))
-                        if self.total_size == 0:
-                            raise Exception(
-                                "Content-Length header is missing or invalid"
-                            )
-
-                        if not self.filename:
-                            self.filename = get_filename(
-                                response.headers, response.url, self.id
-                            )
-                        accept_ranges = response.headers.get("Accept-Ranges")
-                        break
-                    except Exception as e:
-                        self._log(f"Error getting file info: {e}", level="error")
-                        if i == self.max_retries - 1:
-                            if self.session:
-                                await self.session.close()
-                            raise e
-                        self._log(
-                            f"Retrying getting file info ({i + 1}/{self.max_retries})",
-                            level="warning",
-                        )
-                        await asyncio.sleep(2**i)  # Exponential backoff
-
-            self.output_path = change_file_path_if_exist(
-                self.output_dir / self.filename
+            if (
+                self._file_info_cache
+                and time.monotonic() - self._file_info_cache[0]
+                < FILE_INFO_CACHE_SECONDS
+            ):
+                _, self.curl_cffi_required, info = self._file_info_cache
+                self.session = (
+                    AsyncSession() if self.curl_cffi_required else self._create_session()
+                )
+            else:
+                self.session, info = await self._fetch_file_info()
+                self.curl_cffi_required = isinstance(self.session, AsyncSession)
+            self.total_size = info["total_size"]
+            if not self.filename:
+                self.filename = info["filename"]
+            accept_ranges = info["accept_ranges"]
+
+            self.output_path = await asyncio.get_running_loop().run_in_executor(
+                None, change_file_path_if_exist, self.output_dir / self.filename
             )
             self.filename = self.output_path.name
 
@@ -652,7 +1003,7 @@ class TechZDL:
 
             self._log(f"Download completed: {self.filename}")
             self.is_running = False
-            await self.session.close()
+            await self._close_session(self.session)
 
             self.download_success = True
             return self.output_path
@@ -667,3 +1018,6 @@ class TechZDL:
             self.is_running = False
             self.download_error = e
             raise e
+
+        finally:
+            self._shutdown_io_pool()
@@ -1,18 +1,24 @@
-import string
-import random
+import os
 import re
+import errno
+import threading
 from pathlib import Path, PurePath
 import asyncio
-import re
 import urllib.parse
 import mimetypes
 from urllib.parse import unquote_plus
-from typing import Optional, Dict
+from typing import AsyncIterator, Optional, Dict
+from yarl import URL
+
+# Load the MIME types database up front instead of on the first filename lookup
+mimetypes.init()
+
+_INVALID_FILENAME_CHARS_RE = re.compile(r'[<>:"/\\|?*]')
 
 
 def get_random_string(length: int) -> str:
     """
-    Generate a random string of specified length using uppercase letters.
+    Generate a random string of specified length using uppercase hexadecimal digits.
 
     Args:
         length (int): The length of the random string.
@@ -20,103 +26,209 @@ def get_random_string(length: int) -> str:
     Returns:
         str: A random string of specified length.
     """
-    random_string = "".join(random.choices(string.ascii_uppercase, k=length))
-    return random_string
+    return os.urandom((length + 1) // 2).hex()[:length].upper()
+
+
+def install_uvloop() -> bool:
+    """
+    Use uvloop as the asyncio event loop implementation, if it is installed.
+
+    Must be called before the event loop is created, i.e. before `asyncio.run`.
+
+    Returns:
+        bool: True if uvloop is now the event loop implementation, False if it is not installed.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return False
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
 
 
 def change_file_path_if_exist(original_path: Path) -> Path:
     """
     Change the file path if a file with the same name already exists.
 
+    Numbered names are probed in doubling steps and the gap is then binary searched,
+    so finding a free name takes O(log N) checks when N copies already exist.
+
     Args:
         original_path (Path): The original file path.
 
     Returns:
         Path: A new file path if the original exists, otherwise the original path.
     """
-    num = 0
-    path = original_path
-    while path.exists():
-        num += 1
-        name = original_path.stem + f" ({num})"
-        ext = original_path.suffix
-        path = original_path.parent / f"{name}{ext}"
-    return path
+    if not original_path.exists():
+        return original_path
 
+    def numbered_path(num: int) -> Path:
+        return original_path.parent / f"{original_path.stem} ({num}){original_path.suffix}"
 
-class AdjustableSemaphore:
-    def __init__(self, initial_value: int):
-        """
-        Initialize an adjustable semaphore.
+    low, high = 1, 1
+    while numbered_path(high).exists():
+        low, high = high + 1, high * 2
 
-        Args:
-            initial_value (int): The initial value of the semaphore.
-        """
-        self._value = initial_value
-        self._condition = asyncio.Condition()
+    # numbered_path(high) is free, find the first free number from low
+    while low < high:
+        mid = (low + high) // 2
+        if numbered_path(mid).exists():
+            low = mid + 1
+        else:
+            high = mid
+    return numbered_path(high)
 
-    async def acquire(self):
-        """
-        Acquire a semaphore, waiting if necessary until it becomes available.
-        """
-        async with self._condition:
-            while self._value <= 0:
-                await self._condition.wait()
-            self._value -= 1
 
-    async def release(self):
+if hasattr(os, "pwrite"):
+    _pwrite = os.pwrite
+else:
+    _pwrite_lock = threading.Lock()
+
+    def _pwrite(fd: int, data: bytes, offset: int) -> int:
         """
-        Release a semaphore, incrementing the internal counter and notifying waiters.
+        Fallback for platforms without `os.pwrite` (Windows): a locked seek + write,
+        since the file position is shared between threads.
         """
-        async with self._condition:
-            self._value += 1
-            self._condition.notify()
+        with _pwrite_lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            return os.write(fd, data)
 
-    async def set_limit(self, new_limit: int):
-        """
-        Set a new limit for the semaphore.
 
-        Args:
-            new_limit (int): The new limit for the semaphore.
-        """
-        async with self._condition:
-            self._value += new_limit - self._value
-            self._condition.notify_all()
+def write_at(fd: int, data: bytes, offset: int) -> None:
+    """
+    Write all of the data to a file descriptor at the given offset.
+
+    Short writes are continued from where they stopped, using memoryview slices
+    so the remaining data is not copied.
+
+    Args:
+        fd (int): The file descriptor to write to.
+        data (bytes): The data to write.
+        offset (int): The byte offset in the file to write at.
+    """
+    view = memoryview(data)
+    while view:
+        written = _pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+def preallocate_file(fd: int, size: int) -> None:
+    """
+    Reserve space for a file without writing any data to it.
+
+    Uses `os.posix_fallocate` where available and falls back to `os.ftruncate`,
+    which creates a sparse file on filesystems that support it. Other errors, such as
+    the disk not having enough space, are raised.
+
+    Args:
+        fd (int): The file descriptor of the file.
+        size (int): The size of the file in bytes.
+    """
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except AttributeError:
+        os.ftruncate(fd, size)
+    except OSError as e:
+        # The platform or filesystem can't preallocate
+        if e.errno not in (errno.EOPNOTSUPP, errno.ENOSYS, errno.EINVAL):
+            raise e
+        os.ftruncate(fd, size)
+
+
+async def batch_chunks(
+    chunks: AsyncIterator[bytes], min_size: int
+) -> AsyncIterator[bytes]:
+    """
+    Join small chunks from an async byte stream into pieces of at least `min_size` bytes.
+
+    Lets callers hand data to a writer thread once per batch instead of once per
+    network read. The last piece may be smaller.
+
+    Args:
+        chunks (AsyncIterator[bytes]): The byte stream, e.g. `response.content.iter_any()`.
+        min_size (int): Minimum size of each yielded piece in bytes.
+
+    Yields:
+        bytes: The joined pieces.
+    """
+    batch = []
+    batch_size = 0
+    async for chunk in chunks:
+        batch.append(chunk)
+        batch_size += len(chunk)
+        if batch_size >= min_size:
+            yield batch[0] if len(batch) == 1 else b"".join(batch)
+            batch = []
+            batch_size = 0
+
+    if batch:
+        yield batch[0] if len(batch) == 1 else b"".join(batch)
 
 
 def sanitize_filename(filename):
     """
     Replace invalid characters in filenames with an underscore.
     """
-    return re.sub(r'[<>:"/\\|?*]', "_", filename)
+    return _INVALID_FILENAME_CHARS_RE.sub("_", filename)
+
+
+def _find_parameter(header: str, name: str) -> Optional[str]:
+    """
+    Find the value of a parameter in a header like `attachment; name="value"`.
+
+    Args:
+        header (str): The header value.
+        name (str): The parameter name, e.g. `filename`.
+
+    Returns:
+        Optional[str]: The unquoted parameter value, or None if not found.
+    """
+    key = name + "="
+    pos = header.find(key)
+    while pos != -1:
+        # Only a match at the start or right after a ';' (and optional spaces) starts a parameter
+        before = pos - 1
+        while before >= 0 and header[before] in " \t":
+            before -= 1
+        if before < 0 or header[before] == ";":
+            break
+        pos = header.find(key, pos + len(key))
+    else:
+        return None
+
+    start = pos + len(key)
+    if header.startswith('"', start):
+        end = header.find('"', start + 1)
+        return header[start + 1 : end if end != -1 else None]
+
+    end = header.find(";", start)
+    return header[start : end if end != -1 else None].strip(' "')
 
 
 def parse_content_disposition(content_disposition: str) -> Optional[str]:
     """
     Parse the Content-Disposition header to extract the filename.
 
+    `filename*=` (RFC 5987) takes precedence over `filename=` when both are present.
+
     Args:
         content_disposition (str): The Content-Disposition header value.
 
     Returns:
         Optional[str]: The extracted filename, or None if not found.
     """
-    print(content_disposition)
-    parts = content_disposition.split(";")
-    filename = None
-    for part in parts:
-        part = part.strip()
-        if part.startswith("filename="):
-            filename = part.split("=", 1)[1].strip(' "')
-        elif part.startswith("filename*="):
-            match = re.match(r"filename\*=(\S*)''(.*)", part)
-            if match:
-                encoding, value = match.groups()
-                try:
-                    filename = urllib.parse.unquote(value, encoding=encoding)
-                except ValueError:
-                    filename = None
-    return filename
+    value = _find_parameter(content_disposition, "filename*")
+    if value:
+        encoding, sep, encoded = value.partition("''")
+        if sep:
+            try:
+                return urllib.parse.unquote(encoded, encoding=encoding or "utf-8")
+            except (LookupError, ValueError):
+                pass
+
+    return _find_parameter(content_disposition, "filename")
 
 
 def get_filename(headers: Dict[str, str], url: str, id: str) -> str:
@@ -139,7 +251,8 @@ def get_filename(headers: Dict[str, str], url: str, id: str) -> str:
         filename = parse_content_disposition(headers["Content-Disposition"])
 
     if not filename:
-        filename = unquote_plus(url.rstrip("/").split("/")[-1].strip(' "'))
+        # Only the last path segment, without the query string or fragment
+        filename = URL(url).raw_path.rstrip("/").rpartition("/")[2].strip(' "')
 
     if not filename or "." not in filename:
         if headers.get("Content-Type"):
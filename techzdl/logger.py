@@ -1,16 +1,20 @@
 import logging
 
+# One console handler shared by every downloader, their loggers are children of this one
+_root_logger = logging.getLogger("TechZDL")
+if not _root_logger.handlers:
+    _stream_handler = logging.StreamHandler()
+    _stream_handler.setFormatter(
+        logging.Formatter("%(name)s - %(levelname)s - %(message)s")
+    )
+    _root_logger.addHandler(_stream_handler)
+    _root_logger.setLevel(logging.DEBUG)
+
 
 class Logger:
     def __init__(self, name, level=logging.DEBUG):
-        self.logger = logging.getLogger(name)
+        self.logger = _root_logger.getChild(name)
         self.logger.setLevel(level)
-        self.formatter = logging.Formatter("%(name)s - %(levelname)s - %(message)s")
-
-        # StreamHandler for console output
-        self.stream_handler = logging.StreamHandler()
-        self.stream_handler.setFormatter(self.formatter)
-        self.logger.addHandler(self.stream_handler)
 
     def debug(self, message):
         self.logger.debug(message)
@@ -0,0 +1,159 @@
+import asyncio
+import tempfile
+import unittest
+
+from aiohttp import web
+
+from techzdl import TechZDL
+
+
+class RangeServer:
+    """
+    Local HTTP server for a generated file that answers range requests, sending
+    each response at about `bytes_per_second` per connection.
+    """
+
+    def __init__(self, size: int, bytes_per_second: int):
+        self.data = bytes(range(256)) * (size // 256)
+        self.bytes_per_second = bytes_per_second
+        self.ranges = []  # (loop time, start, end) of each range request
+        self.url = None
+        self._runner = None
+
+    def should_fail(self, start: int, end: int) -> bool:
+        return False
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        size = len(self.data)
+        if request.method == "HEAD":
+            return web.Response(
+                headers={"Content-Length": str(size), "Accept-Ranges": "bytes"}
+            )
+
+        start, end = map(int, request.headers["Range"][6:].split("-"))
+        self.ranges.append((asyncio.get_running_loop().time(), start, end))
+        if self.should_fail(start, end):
+            return web.Response(status=503)
+
+        response = web.StreamResponse(
+            status=206,
+            headers={
+                "Content-Range": f"bytes {start}-{end}/{size}",
+                "Content-Length": str(end - start + 1),
+            },
+        )
+        await response.prepare(request)
+        piece_size = 16 * 1024
+        for offset in range(start, end + 1, piece_size):
+            await response.write(self.data[offset : min(offset + piece_size, end + 1)])
+            await asyncio.sleep(piece_size / self.bytes_per_second)
+        await response.write_eof()
+        return response
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_route("*", "/file.bin", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}/file.bin"
+
+    async def stop(self) -> None:
+        await self._runner.cleanup()
+
+
+async def download_watching_workers(downloader: TechZDL) -> list:
+    """
+    Run a download and return the `(loop time, dynamic_workers)` pairs seen while it ran.
+    """
+    loop = asyncio.get_running_loop()
+    seen = []
+
+    async def watch():
+        while True:
+            seen.append((loop.time(), downloader.dynamic_workers))
+            await asyncio.sleep(0.05)
+
+    watcher = asyncio.create_task(watch())
+    try:
+        await downloader.start()
+    finally:
+        watcher.cancel()
+    return seen
+
+
+class DynamicWorkersTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.output_dir = tempfile.TemporaryDirectory()
+
+    async def asyncTearDown(self):
+        self.output_dir.cleanup()
+
+    async def test_workers_keep_growing_while_ranges_are_merged(self):
+        size = 16 * 1024 * 1024
+        server = RangeServer(size=size, bytes_per_second=1024 * 1024)
+        await server.start()
+        try:
+            downloader = TechZDL(
+                url=server.url,
+                output_dir=self.output_dir.name,
+                debug=False,
+                progress=False,
+                chunk_size=16 * 1024,
+                initial_dynamic_workers=2,
+                dynamic_workers_update_interval=0.5,
+            )
+            seen = await download_watching_workers(downloader)
+        finally:
+            await server.stop()
+
+        self.assertTrue(downloader.download_success)
+
+        # 1024 chunks are planned as 128 ranges of 8 chunks each
+        planned_size = 8 * 16 * 1024
+        merged = [t for t, start, end in server.ranges if end - start + 1 > planned_size]
+        self.assertTrue(merged)
+
+        # No worker takes more than its share of the queue, and the pool keeps growing after
+        # merging starts instead of the queue being drained by the first few workers
+        self.assertLessEqual(max(end - start + 1 for _, start, end in server.ranges), size // 32)
+        workers_at_merge = max(w for t, w in seen if t <= merged[0])
+        self.assertGreater(max(w for t, w in seen if t > merged[0]), workers_at_merge)
+
+    async def test_workers_halve_when_requests_fail(self):
+        class FlakyServer(RangeServer):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.failed = set()
+
+            def should_fail(self, start, end):
+                # The first request for every third range gets a 503, 25% of all requests
+                if (start // (128 * 1024)) % 3 or start in self.failed:
+                    return False
+                self.failed.add(start)
+                return True
+
+        server = FlakyServer(size=4 * 1024 * 1024, bytes_per_second=256 * 1024)
+        await server.start()
+        try:
+            downloader = TechZDL(
+                url=server.url,
+                output_dir=self.output_dir.name,
+                debug=False,
+                progress=False,
+                chunk_size=64 * 1024,
+                initial_dynamic_workers=8,
+                dynamic_workers_update_interval=0.5,
+            )
+            # Failed chunk requests are logged as errors, keep them out of the test output
+            with self.assertLogs("TechZDL", level="ERROR"):
+                seen = await download_watching_workers(downloader)
+        finally:
+            await server.stop()
+
+        self.assertTrue(downloader.download_success)
+        self.assertTrue(server.failed)
+        # Halved from 8, backing off after slow intervals would only go down to 6
+        self.assertLessEqual(min(w for _, w in seen), 4)